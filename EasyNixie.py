@@ -5,21 +5,100 @@ Based on: EasyNixie Arduino library at github.com/allexoK/EasyNixie
 EasyNixie board can be had here: https://www.tindie.com/products/allexok/easynixie/
 """
 
+import array
 import board
+import busio
 import digitalio
 import time
 import pwmio
 from micropython import const
-import random
+
+try:
+    import rp2pio  # only on RP2040/RP2350 boards
+except ImportError:
+    rp2pio = None
+
+# Set to 1 for diagnostic prints (USB serial output costs milliseconds per call)
+DEBUG = const(0)
 
 # Color constants (matching Arduino library EXACTLY)
-EASY_NIXIE_BLUE = 1
-EASY_NIXIE_GREEN = 2  
-EASY_NIXIE_RED = 3
-EASY_NIXIE_WHITE = 4
-EASY_NIXIE_RuB = 5  # Red + Blue
-EASY_NIXIE_RuG = 6  # Red + Green  
-EASY_NIXIE_BuG = 7  # Blue + Green
+EASY_NIXIE_BLUE = const(1)
+EASY_NIXIE_GREEN = const(2)
+EASY_NIXIE_RED = const(3)
+EASY_NIXIE_WHITE = const(4)
+EASY_NIXIE_RuB = const(5)  # Red + Blue
+EASY_NIXIE_RuG = const(6)  # Red + Green
+EASY_NIXIE_BuG = const(7)  # Blue + Green
+
+# Second shift register bits
+_LEDS_OFF = const(0b00011100)  # LED cathodes, active low
+_VOLTAGE_BIT = const(0b00100000)
+_COMMA_BIT = const(0b01000000)
+
+_BLANK = const(10)  # digit value that lights no cathode
+
+# Second shift register bits cleared to light each color's LEDs
+_COLOR_MASK = {
+    EASY_NIXIE_BLUE: 0b11111011,
+    EASY_NIXIE_GREEN: 0b11110111,
+    EASY_NIXIE_RED: 0b11101111,
+    EASY_NIXIE_WHITE: 0b11100011,
+    EASY_NIXIE_RuB: 0b11101011,
+    EASY_NIXIE_RuG: 0b11100111,
+    EASY_NIXIE_BuG: 0b11110011,
+}
+
+# Digits 8 and 9 are selected by the second shift register, 0-7 by the first
+_DIGIT_BITS = {8: 0b00000001, 9: 0b00000010}
+
+def _encode_tube_data(number, color, voltage, comma):
+    """Build the two shift register bytes for a single tube (internal helper)"""
+    # Second shift register data (control bits)
+    second_shift_register_data = _LEDS_OFF & _COLOR_MASK.get(color, 0xFF)
+    second_shift_register_data |= _DIGIT_BITS.get(number, 0)
+    if voltage:
+        second_shift_register_data |= _VOLTAGE_BIT
+    if comma:
+        second_shift_register_data |= _COMMA_BIT
+    
+    # First shift register data (digits 0-7)
+    first_shift_register_data = 1 << number if number < 8 else 0
+    
+    return second_shift_register_data, first_shift_register_data
+
+def _build_table():
+    """Encode every (number, color, voltage, comma) combination once at import"""
+    table = bytearray(2 * (_BLANK + 1) * 8 * 4)
+    pos = 0
+    for number in range(_BLANK + 1):  # 0-9 plus blank
+        for color in range(8):  # 0 leaves all LEDs off, 1-7 are EASY_NIXIE_* colors
+            for voltage in (False, True):
+                for comma in (False, True):
+                    table[pos], table[pos + 1] = _encode_tube_data(number, color, voltage, comma)
+                    pos += 2
+    return bytes(table)
+
+# Two wire bytes (second register, first register) per combination
+_TABLE = _build_table()
+
+# PIO program (hand-assembled) shifting bytes out MSB first on DSIN with SHCP
+# as side-set, pushing one word back per byte so writers can wait for the last bit:
+#   .side_set 1
+#       pull             side 0
+#       set x, 7         side 0
+#   bitloop:
+#       out pins, 1      side 0
+#       jmp x-- bitloop  side 1
+#       push             side 0
+_SHIFT_PROGRAM = array.array("H", [0x80A0, 0xE027, 0x6001, 0x1042, 0x8020])
+
+def _table_index(number, color, voltage, comma):
+    """Offset of the two wire bytes for a tube in _TABLE"""
+    if not 0 <= number < _BLANK:
+        number = _BLANK
+    if not 0 <= color < 8:
+        color = 0  # unknown colors leave all LEDs off
+    return ((number * 8 + color) * 4 + (2 if voltage else 0) + (1 if comma else 0)) * 2
 
 class EasyNixie:
     def __init__(self, out_en_pin, shcp_pin, stcp_pin, dsin_pin, num_tubes=1):
@@ -34,26 +113,71 @@ class EasyNixie:
             num_tubes: Number of daisy-chained modules (default: 1)
         """
         self.num_tubes = num_tubes
-        self.display_buffer = [(10, EASY_NIXIE_WHITE, True, False, 0)] * num_tubes  # (digit, color, voltage, comma, dimming)
+        self._max_count = 10 ** min(num_tubes, 2)  # test_pattern counts up to 99 at most
         
-        # Initialize control pins exactly like Arduino
-        self.shcp = digitalio.DigitalInOut(shcp_pin)
-        self.shcp.direction = digitalio.Direction.OUTPUT
-        self.shcp.value = False
+        # Wire bytes for the whole chain, in shift order (tube num_tubes-1 first), all tubes blank
+        blank = _table_index(_BLANK, EASY_NIXIE_WHITE, True, False)
+        self._wire_buf = bytearray(_TABLE[blank:blank + 2] * num_tubes)
+        self._dimming = bytearray(num_tubes)  # per-tube dimming (0-255)
         
+        # Storage clock (STCP) stays a plain GPIO and is used as the latch
         self.stcp = digitalio.DigitalInOut(stcp_pin)
         self.stcp.direction = digitalio.Direction.OUTPUT
         self.stcp.value = False
         
-        self.dsin = digitalio.DigitalInOut(dsin_pin)
-        self.dsin.direction = digitalio.Direction.OUTPUT
-        self.dsin.value = False
+        # Shift clock (SHCP) and data (DSIN) are driven by hardware SPI
+        # SPI mode 0, MSB first matches the 74HC595 timing used by Arduino
+        self.spi = None
+        self.sm = None
+        self._write = None
+        try:
+            self.spi = busio.SPI(clock=shcp_pin, MOSI=dsin_pin)
+            while not self.spi.try_lock():
+                pass
+            self.spi.configure(baudrate=1000000, polarity=0, phase=0)
+            self._write = self.spi.write
+        except Exception as e:
+            print(f"SPI setup failed: {e}")
+            # Release the pins if the bus was created but could not be configured
+            if self.spi is not None:
+                self.spi.deinit()
+                self.spi = None
+        
+        # On RP2040/RP2350 any pins can be driven by a PIO state machine instead
+        if self._write is None and rp2pio is not None:
+            try:
+                # Two PIO cycles per bit gives the same 1 MHz shift clock as SPI
+                self.sm = rp2pio.StateMachine(
+                    _SHIFT_PROGRAM,
+                    frequency=2000000,
+                    first_out_pin=dsin_pin,
+                    first_sideset_pin=shcp_pin,
+                    out_shift_right=False,
+                )
+                self._pio_ack = bytearray(2 * num_tubes)
+                self._write = self._pio_write
+            except Exception as e:
+                print(f"PIO setup failed: {e}")
+        
+        if self._write is None:
+            # Fall back to bit-banging
+            self.shcp = digitalio.DigitalInOut(shcp_pin)
+            self.shcp.direction = digitalio.Direction.OUTPUT
+            self.shcp.value = False
+            
+            self.dsin = digitalio.DigitalInOut(dsin_pin)
+            self.dsin.direction = digitalio.Direction.OUTPUT
+            self.dsin.value = False
+            self._write = self._bitbang_write
+            print("Falling back to bit-banged SHCP/DSIN")
         
         # Set up PWM on OUT_EN for dimming
+        self._last_duty = -1  # last duty cycle written, to skip redundant PWM writes
         try:
             self.out_en_pwm = pwmio.PWMOut(out_en_pin, frequency=1000, duty_cycle=65535)
             self.dimming_available = True
-            print("PWM dimming successfully initialized on OUT_EN pin")
+            if DEBUG:
+                print("PWM dimming successfully initialized on OUT_EN pin")
         except Exception as e:
             print(f"PWM setup failed: {e}")
             # Fall back to digital control
@@ -65,25 +189,54 @@ class EasyNixie:
     
     def slow_shift_out(self, data_byte):
         """
-        Shift out a byte MSB first, exactly matching Arduino slowShiftOut
+        Shift out a byte MSB first, matching Arduino slowShiftOut
+        The SPI or PIO peripheral (or the bit-banged fallback) generates the clock edges
         """
-        for i in range(8):
-            bit_pos = 7 - i
-            bit_value = bool(data_byte & (1 << bit_pos))
-            self.dsin.value = bit_value
-            time.sleep(0.000001)
-            self.shcp.value = True
-            time.sleep(0.000001)
-            self.shcp.value = False
-            time.sleep(0.000001)
+        self._write(bytes([data_byte]))
+    
+    def _pio_write(self, buf, *, start=0, end=None):
+        """
+        Shift out bytes MSB first through the PIO state machine
+        Reads back one acknowledgement per byte, so it returns only after the last bit is clocked in
+        Takes the same arguments as busio.SPI.write
+        """
+        if end is None:
+            end = len(buf)
+        self.sm.write_readinto(buf, self._pio_ack, out_start=start, out_end=end, in_end=end - start)
+    
+    def _bitbang_write(self, buf, *, start=0, end=None):
+        """
+        Shift out bytes MSB first by toggling SHCP/DSIN directly (used when neither SPI nor PIO is available)
+        Each pin write already outlasts the 74HC595 setup/hold times, so no delays are needed
+        Takes the same arguments as busio.SPI.write
+        """
+        shcp = self.shcp
+        dsin = self.dsin
+        if end is None:
+            end = len(buf)
+        for i in range(start, end):
+            data_byte = buf[i]
+            for bit_mask in (0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01):
+                dsin.value = data_byte & bit_mask
+                shcp.value = True
+                shcp.value = False
+    
+    def _set_dim(self, dimming):
+        """Apply dimming (0-255) to the OUT_EN PWM, skipping the write if unchanged (internal helper)"""
+        dimming = min(max(dimming, 0), 255)
+        duty_cycle = int(dimming * 65535) // 255
+        if duty_cycle != self._last_duty:
+            self.out_en_pwm.duty_cycle = duty_cycle
+            self._last_duty = duty_cycle
     
     def latch(self):
         """
-        Latch function matching Arduino - LOW, delay, HIGH (no return to LOW!)
+        Latch function matching Arduino - LOW, HIGH (no return to LOW!)
+        No delay is needed: two pin writes take far longer than the 74HC595's ~20 ns setup time
         """
-        self.stcp.value = False
-        time.sleep(0.001)
-        self.stcp.value = True
+        stcp = self.stcp
+        stcp.value = False
+        stcp.value = True
     
     def set_nixie(self, number, color=EASY_NIXIE_WHITE, voltage=True, comma=False, dimming=255):
         """
@@ -100,48 +253,11 @@ class EasyNixie:
         # Handle PWM dimming on OUT_EN pin (like Arduino analogWrite)
         # Arduino analogWrite: higher value = higher duty cycle = brighter
         if self.dimming_available:
-            duty_cycle = int((dimming / 255.0) * 65535)
-            self.out_en_pwm.duty_cycle = duty_cycle
-            print(f"Set dimming: {dimming} -> duty_cycle: {duty_cycle}")
-        elif dimming > 0:
+            self._set_dim(dimming)
+        elif DEBUG and dimming > 0:
             print(f"Warning: Dimming requested ({dimming}) but PWM not available")
         
-        # Build second shift register data (control bits)
-        second_shift_register_data = 0b00011100
-        
-        if number == 8:
-            second_shift_register_data |= 0b00000001
-        if number == 9:
-            second_shift_register_data |= 0b00000010
-        
-        if color == EASY_NIXIE_RED:
-            second_shift_register_data &= 0b11101111
-        if color == EASY_NIXIE_GREEN:
-            second_shift_register_data &= 0b11110111
-        if color == EASY_NIXIE_BLUE:
-            second_shift_register_data &= 0b11111011
-        if color == EASY_NIXIE_WHITE:
-            second_shift_register_data &= 0b11100011
-        if color == EASY_NIXIE_RuB:
-            second_shift_register_data &= 0b11101011
-        if color == EASY_NIXIE_RuG:
-            second_shift_register_data &= 0b11100111
-        if color == EASY_NIXIE_BuG:
-            second_shift_register_data &= 0b11110011
-        
-        if voltage:
-            second_shift_register_data |= 0b00100000
-        if comma:
-            second_shift_register_data |= 0b01000000
-        
-        self.slow_shift_out(second_shift_register_data)
-        
-        if number < 8:
-            first_shift_register_data = 1 << number
-        else:
-            first_shift_register_data = 0
-        
-        self.slow_shift_out(first_shift_register_data)
+        self._send_tube_data(number, color, voltage, comma)
     
     def set_tube(self, tube_index, number, color=EASY_NIXIE_WHITE, voltage=True, comma=False, dimming=255):
         """
@@ -153,69 +269,40 @@ class EasyNixie:
             color: LED color
             voltage: High voltage enable
             comma: Comma/decimal point  
-            dimming: Brightness (0=off, 255=brightest)
+            dimming: Brightness (0=off, 255=brightest). All tubes share one OUT_EN pin,
+                so update_display() applies tube 0's dimming to the whole display
         """
-        if 0 <= tube_index < self.num_tubes:
-            self.display_buffer[tube_index] = (number, color, voltage, comma, dimming)
+        num_tubes = self.num_tubes
+        if 0 <= tube_index < num_tubes:
+            idx = _table_index(number, color, voltage, comma)
+            pos = 2 * (num_tubes - 1 - tube_index)
+            wire_buf = self._wire_buf
+            wire_buf[pos] = _TABLE[idx]
+            wire_buf[pos + 1] = _TABLE[idx + 1]
+            self._dimming[tube_index] = min(max(int(dimming), 0), 255)
     
     def update_display(self):
         """
         Update all tubes with buffered data
         Sends data to all tubes then latches simultaneously
+        Brightness comes from tube 0's dimming; the PWM is only rewritten when it changes
         """
-        # Send data for all tubes (rightmost tube first for daisy chain)
-        for i in range(self.num_tubes - 1, -1, -1):
-            number, color, voltage, comma, dimming = self.display_buffer[i]
-            
-            # Set the dimming for this update (affects all tubes)
-            if self.dimming_available:
-                duty_cycle = int((dimming / 255.0) * 65535)
-                self.out_en_pwm.duty_cycle = duty_cycle
-            
-            # Build and send data for this tube
-            self._send_tube_data(number, color, voltage, comma)
+        # Set the dimming for this update (affects all tubes)
+        # OUT_EN is shared by the whole chain, so tube 0's dimming applies to every tube
+        if self.dimming_available:
+            self._set_dim(self._dimming[0])
+        
+        # Tubes are already encoded in shift order, send the whole chain in a single transfer
+        self._write(self._wire_buf)
         
         # Latch all data to outputs simultaneously
         self.latch()
     
     def _send_tube_data(self, number, color, voltage, comma):
         """Send data for a single tube (internal helper)"""
-        # Build second shift register data (control bits)
-        second_shift_register_data = 0b00011100
-        
-        if number == 8:
-            second_shift_register_data |= 0b00000001
-        if number == 9:
-            second_shift_register_data |= 0b00000010
-        
-        if color == EASY_NIXIE_RED:
-            second_shift_register_data &= 0b11101111
-        if color == EASY_NIXIE_GREEN:
-            second_shift_register_data &= 0b11110111
-        if color == EASY_NIXIE_BLUE:
-            second_shift_register_data &= 0b11111011
-        if color == EASY_NIXIE_WHITE:
-            second_shift_register_data &= 0b11100011
-        if color == EASY_NIXIE_RuB:
-            second_shift_register_data &= 0b11101011
-        if color == EASY_NIXIE_RuG:
-            second_shift_register_data &= 0b11100111
-        if color == EASY_NIXIE_BuG:
-            second_shift_register_data &= 0b11110011
-        
-        if voltage:
-            second_shift_register_data |= 0b00100000
-        if comma:
-            second_shift_register_data |= 0b01000000
-        
-        self.slow_shift_out(second_shift_register_data)
-        
-        if number < 8:
-            first_shift_register_data = 1 << number
-        else:
-            first_shift_register_data = 0
-        
-        self.slow_shift_out(first_shift_register_data)
+        # Second shift register (control bits) then first (digit select) in one transfer
+        idx = _table_index(number, color, voltage, comma)
+        self._write(_TABLE, start=idx, end=idx + 2)
     
     def set_number(self, number, color=EASY_NIXIE_WHITE, leading_zeros=False, dimming=255):
         """
@@ -227,43 +314,35 @@ class EasyNixie:
             leading_zeros: If True, show leading zeros
             dimming: Brightness (0=off, 255=brightest)
         """
-        # Convert number to string
-        if number < 0:
-            num_str = str(abs(number))
-        else:
-            num_str = str(number)
-        
-        # Clear display buffer
-        for i in range(self.num_tubes):
-            self.display_buffer[i] = (10, color, True, False, dimming)  # 10 = blank
-        
-        # Fill from right to left
-        for i, digit_char in enumerate(reversed(num_str)):
-            tube_pos = self.num_tubes - 1 - i
-            if tube_pos >= 0 and digit_char.isdigit():
-                self.display_buffer[tube_pos] = (int(digit_char), color, True, False, dimming)
-        
-        # Handle leading zeros
-        if leading_zeros:
-            for i in range(self.num_tubes - len(num_str)):
-                if self.display_buffer[i][0] == 10:  # If blank
-                    self.display_buffer[i] = (0, color, True, False, dimming)
+        # Peel digits off from the right, rightmost tube first
+        n = abs(int(number))
+        last = self.num_tubes - 1
+        set_tube = self.set_tube
+        for tube_pos in range(last, -1, -1):
+            if n or leading_zeros or tube_pos == last:
+                n, digit = divmod(n, 10)
+            else:
+                digit = _BLANK
+            set_tube(tube_pos, digit, color, True, False, dimming)
     
     def clear(self):
         """Clear all tubes"""
+        set_tube = self.set_tube
         for i in range(self.num_tubes):
-            self.display_buffer[i] = (10, EASY_NIXIE_WHITE, True, False, 0)  # Blank and off
+            set_tube(i, _BLANK, EASY_NIXIE_WHITE, True, False, 0)  # Blank and off
         self.update_display()
     
     def test_pattern(self):
         """Run a comprehensive test pattern"""
-        print("Running EasyNixie test pattern...")
+        if DEBUG:
+            print("Running EasyNixie test pattern...")
         
         # Test each digit with different colors
         colors = [EASY_NIXIE_WHITE, EASY_NIXIE_RED, EASY_NIXIE_GREEN, EASY_NIXIE_BLUE]
         
         for color in colors:
-            print(f"Testing color: {color}")
+            if DEBUG:
+                print(f"Testing color: {color}")
             for digit in range(10):
                 for tube in range(self.num_tubes):
                     self.set_tube(tube, digit, color, dimming=255)
@@ -271,16 +350,40 @@ class EasyNixie:
                 time.sleep(0.3)
         
         # Test counting
-        print("Testing counting...")
-        for count in range(min(100, 10**self.num_tubes)):
+        if DEBUG:
+            print("Testing counting...")
+        for count in range(self._max_count):
             self.set_number(count, EASY_NIXIE_WHITE, leading_zeros=True, dimming=128)
             self.update_display()
             time.sleep(0.05)
         
         self.clear()
 
+# supervisor.ticks_ms() wraps around at 2**29
+_TICKS_PERIOD = const(1 << 29)
+_TICKS_MAX = const(_TICKS_PERIOD - 1)
+_TICKS_HALFPERIOD = const(_TICKS_PERIOD // 2)
+
+def _ticks_diff(ticks1, ticks2):
+    """Signed difference ticks1 - ticks2 in ms, correct across wraparound"""
+    diff = (ticks1 - ticks2) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+def _wait_frame(ticks_ms, deadline, frame_ms):
+    """
+    Sleep until deadline (a ticks_ms() value) and return the next frame's deadline
+    Pacing against deadlines keeps the frame rate steady regardless of update time
+    """
+    delay = _ticks_diff(deadline, ticks_ms())
+    if delay > 0:
+        time.sleep(delay / 1000)
+    return (deadline + frame_ms) & _TICKS_MAX
+
 def main():
     """Test with 0-99 counting"""
+    import random
+    from supervisor import ticks_ms
+    
     # Pin configuration for Raspberry Pi Pico 2 W
     OUT_EN_PIN = board.GP21   # Output Enable
     SHCP_PIN = board.GP18     # Shift Clock  
@@ -302,36 +405,37 @@ def main():
     
     # COUNT FROM 0 TO 99
     print("\n=== COUNTING FROM 0 TO 99 ===")
+    deadline = (ticks_ms() + 80) & _TICKS_MAX
     for count in range(100):
-        if count % 10 == 0:
-            print(f"Count: {count}")
         if count < 99:
             nixie.set_number(count, EASY_NIXIE_WHITE, leading_zeros=True, dimming=128)
         else:
             nixie.set_number(count, EASY_NIXIE_RED, leading_zeros=True, dimming=64)
         nixie.update_display()
-        time.sleep(0.08)
+        deadline = _wait_frame(ticks_ms, deadline, 80)
     
     print("Counting complete!\n")
     print("random numbers and dimming")
       
     for loops in range(50): 
+        deadline = (ticks_ms() + 80) & _TICKS_MAX
         for count in range(20):
-            if count % 10 == 0:
-                print(f"Count: {count}")
-            digit = random.randint(0,99)
+            # Uniform 0-99 from 7 random bits, rejecting 100-127
+            digit = random.getrandbits(7)
+            while digit > 99:
+                digit = random.getrandbits(7)
 
             nixie.set_number(digit, EASY_NIXIE_GREEN, leading_zeros=True, dimming=64)
             nixie.update_display()
-            time.sleep(0.08)
+            deadline = _wait_frame(ticks_ms, deadline, 80)
         
+        deadline = (ticks_ms() + 10) & _TICKS_MAX
         for count in range(255):
-            if count % 10 == 0:
-                print(f"Count: {count}")
             nixie.set_number(digit, EASY_NIXIE_RED, leading_zeros=True, dimming=count)
             nixie.update_display()
-            time.sleep(0.01)
+            deadline = _wait_frame(ticks_ms, deadline, 10)
     
+    print(f"Showed {loops + 1} rounds of random numbers")
     nixie.clear()
 
 if __name__ == "__main__":